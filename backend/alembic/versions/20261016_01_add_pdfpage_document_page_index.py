@@ -0,0 +1,27 @@
+"""add composite (document_id, page_number) index to pdf_pages
+
+Revision ID: 20261016_01
+Revises: 20250916_01
+Create Date: 2026-10-16 00:00:00.000000
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '20261016_01'
+down_revision = '20250916_01'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_pdf_pages_document_id_page_number',
+        'pdf_pages',
+        ['document_id', 'page_number'],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_pdf_pages_document_id_page_number', table_name='pdf_pages')
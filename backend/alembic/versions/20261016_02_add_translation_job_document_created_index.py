@@ -0,0 +1,27 @@
+"""add composite (document_id, created_at) index to translation_jobs
+
+Revision ID: 20261016_02
+Revises: 20261016_01
+Create Date: 2026-10-16 00:00:00.000000
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '20261016_02'
+down_revision = '20261016_01'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_translation_jobs_document_id_created_at',
+        'translation_jobs',
+        ['document_id', 'created_at'],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_translation_jobs_document_id_created_at', table_name='translation_jobs')
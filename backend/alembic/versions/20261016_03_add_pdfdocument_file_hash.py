@@ -0,0 +1,26 @@
+"""add file_hash column to pdf_documents
+
+Revision ID: 20261016_03
+Revises: 20261016_02
+Create Date: 2026-10-16 00:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261016_03'
+down_revision = '20261016_02'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('pdf_documents', sa.Column('file_hash', sa.String(length=64), nullable=True))
+    op.create_index('ix_pdf_documents_file_hash', 'pdf_documents', ['file_hash'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_pdf_documents_file_hash', table_name='pdf_documents')
+    op.drop_column('pdf_documents', 'file_hash')
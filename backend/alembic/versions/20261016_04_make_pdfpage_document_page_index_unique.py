@@ -0,0 +1,34 @@
+"""make the (document_id, page_number) index on pdf_pages unique
+
+Revision ID: 20261016_04
+Revises: 20261016_03
+Create Date: 2026-10-16 00:00:00.000000
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '20261016_04'
+down_revision = '20261016_03'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.drop_index('ix_pdf_pages_document_id_page_number', table_name='pdf_pages')
+    op.create_index(
+        'ix_pdf_pages_document_id_page_number',
+        'pdf_pages',
+        ['document_id', 'page_number'],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_pdf_pages_document_id_page_number', table_name='pdf_pages')
+    op.create_index(
+        'ix_pdf_pages_document_id_page_number',
+        'pdf_pages',
+        ['document_id', 'page_number'],
+    )
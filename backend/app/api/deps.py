@@ -0,0 +1,33 @@
+from fastapi import File, HTTPException, UploadFile
+import logging
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+async def validate_pdf_upload(file: UploadFile = File(...)) -> UploadFile:
+    """Reject uploads without a .pdf filename or with a declared size that is empty or too large"""
+    if not file.filename:
+        error_msg = "No filename provided"
+        logger.error(error_msg)
+        raise HTTPException(status_code=400, detail=error_msg)
+    
+    if not file.filename.lower().endswith('.pdf'):
+        error_msg = f"Only PDF files are allowed. Received: {file.filename}"
+        logger.error(error_msg)
+        raise HTTPException(status_code=400, detail=error_msg)
+    
+    # Check file size when the client declared one; streamed writes enforce the limit otherwise
+    safe_size = getattr(file, "size", None)
+    if safe_size is not None and safe_size > settings.MAX_FILE_SIZE:
+        error_msg = f"File too large. Maximum size: {settings.MAX_FILE_SIZE} bytes, received: {safe_size} bytes"
+        logger.error(error_msg)
+        raise HTTPException(status_code=413, detail=error_msg)
+    
+    # Check if file is empty
+    if safe_size == 0:
+        error_msg = "File is empty"
+        logger.error(error_msg)
+        raise HTTPException(status_code=400, detail=error_msg)
+    
+    return file
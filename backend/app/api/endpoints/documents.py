@@ -1,17 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, BackgroundTasks
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, ConfigDict, Field
 from sqlalchemy.orm import Session
-from typing import List
+from typing import Optional
 import os
 import uuid
+import hashlib
 import logging
 import traceback
 from datetime import datetime
 
+from app.api.deps import validate_pdf_upload
 from app.core.database import get_db
 from app.core.config import settings
+from app.core.files import remove_file_quietly
+from app.core.streaming import stream_json_rows
 from app.models.models import PDFDocument, PDFPage
 from app.services.pdf_service import PDFService
-from app.services.translation_service import TranslationService
+from app.services.translation_service import TranslationService, get_translation_service
 from app.workers.celery_worker import process_document_translation
 import aiofiles
 
@@ -20,108 +27,97 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+class DocumentOut(BaseModel):
+    """Document details, read straight from a PDFDocument row"""
+    model_config = ConfigDict(from_attributes=True)
+    
+    id: int
+    uuid: Optional[str] = None
+    filename: str = Field(validation_alias="original_filename")
+    status: Optional[str] = None
+    total_pages: Optional[int] = None
+    total_characters: Optional[int] = None
+    created_at: Optional[datetime] = None
+
 @router.post("/upload", response_model=dict)
 async def upload_pdf(
-    file: UploadFile = File(...),
+    file: UploadFile = Depends(validate_pdf_upload),
     db: Session = Depends(get_db)
 ):
     """Upload PDF document with comprehensive error handling and logging"""
     
     # Log upload attempt
-    safe_size = getattr(file, "size", None)
-    logger.info(f"Upload attempt started: filename={file.filename}, content_type={file.content_type}, size={safe_size}")
+    logger.info(f"Upload attempt started: filename={file.filename}, content_type={file.content_type}, size={getattr(file, 'size', None)}")
     
     try:
-        # Enhanced file validation
-        if not file.filename:
-            error_msg = "No filename provided"
-            logger.error(error_msg)
-            raise HTTPException(status_code=400, detail=error_msg)
-        
-        if not file.filename.lower().endswith('.pdf'):
-            error_msg = f"Only PDF files are allowed. Received: {file.filename}"
-            logger.error(error_msg)
-            raise HTTPException(status_code=400, detail=error_msg)
-        
-        # Check file size
-        if safe_size is not None and safe_size > settings.MAX_FILE_SIZE:
-            error_msg = f"File too large. Maximum size: {settings.MAX_FILE_SIZE} bytes, received: {file.size} bytes"
-            logger.error(error_msg)
-            raise HTTPException(status_code=413, detail=error_msg)
-        
-        # Check if file is empty
-        if safe_size == 0:
-            error_msg = "File is empty"
-            logger.error(error_msg)
-            raise HTTPException(status_code=400, detail=error_msg)
-        
-        # Create upload directory if not exists
-        try:
-            os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
-            logger.debug(f"Upload directory ensured: {settings.UPLOAD_DIR}")
-        except Exception as e:
-            error_msg = f"Failed to create upload directory: {str(e)}"
-            logger.error(error_msg)
-            raise HTTPException(status_code=500, detail=error_msg)
-        
         # Generate unique filename
-        file_id = str(uuid.uuid4())
+        file_id = uuid.uuid4().hex
         filename = f"{file_id}.pdf"
         file_path = os.path.join(settings.UPLOAD_DIR, filename)
         
         logger.info(f"Generated file path: {file_path}")
         
-        # Save file with error handling
+        # Stream file to disk in fixed-size chunks
+        actual_size = 0
+        hasher = hashlib.blake2b(digest_size=32)
         try:
             async with aiofiles.open(file_path, 'wb') as f:
-                content = await file.read()
-                await f.write(content)
-            
-            # Verify file was written correctly
-            if not os.path.exists(file_path):
-                error_msg = "File was not saved successfully"
-                logger.error(error_msg)
-                raise HTTPException(status_code=500, detail=error_msg)
-            
-            actual_size = os.path.getsize(file_path)
-            if actual_size != len(content):
-                error_msg = f"File size mismatch. Expected: {len(content)}, Actual: {actual_size}"
-                logger.error(error_msg)
-                raise HTTPException(status_code=500, detail=error_msg)
-            
-            logger.info(f"File saved successfully: {file_path}, size: {actual_size} bytes")
+                while chunk := await file.read(settings.UPLOAD_CHUNK_SIZE):
+                    actual_size += len(chunk)
+                    if actual_size > settings.MAX_FILE_SIZE:
+                        break
+                    hasher.update(chunk)
+                    await f.write(chunk)
             
         except Exception as e:
             error_msg = f"Failed to save file: {str(e)}"
             logger.error(error_msg, exc_info=True)
             # Clean up partial file
-            if os.path.exists(file_path):
-                try:
-                    os.remove(file_path)
-                    logger.debug(f"Cleaned up partial file: {file_path}")
-                except:
-                    pass
+            await run_in_threadpool(remove_file_quietly, file_path)
+            logger.debug(f"Cleaned up partial file: {file_path}")
             raise HTTPException(status_code=500, detail=error_msg)
         
+        # Reject oversized uploads as soon as the limit is crossed
+        if actual_size > settings.MAX_FILE_SIZE:
+            error_msg = f"File too large. Maximum size: {settings.MAX_FILE_SIZE} bytes"
+            logger.error(error_msg)
+            await run_in_threadpool(remove_file_quietly, file_path)
+            logger.debug(f"Cleaned up oversized file: {file_path}")
+            raise HTTPException(status_code=413, detail=error_msg)
+        
+        logger.info(f"File saved successfully: {file_path}, size: {actual_size} bytes")
+        
+        # Skip reprocessing when identical content was uploaded before
+        file_hash = hasher.hexdigest()
+        existing_doc = await run_in_threadpool(PDFService.find_processed_duplicate, db, file_hash)
+        if existing_doc:
+            logger.info(f"Duplicate upload of document_id={existing_doc.id}, discarding {file_path}")
+            await run_in_threadpool(remove_file_quietly, file_path)
+            
+            return {
+                "message": "File already uploaded",
+                "document_id": existing_doc.id,
+                "uuid": existing_doc.uuid,
+                "total_pages": existing_doc.total_pages,
+                "file_size_bytes": actual_size,
+                "duplicate": True
+            }
+        
         # Save to database with error handling
         try:
-            pdf_doc = PDFService.save_pdf_to_db(db, filename, file.filename, file_path)
+            pdf_doc = await run_in_threadpool(PDFService.save_pdf_to_db, db, filename, file.filename, file_path)
             logger.info(f"Document saved to database: id={pdf_doc.id}, uuid={pdf_doc.uuid}")
         except Exception as e:
             error_msg = f"Failed to save document to database: {str(e)}"
             logger.error(error_msg, exc_info=True)
             # Clean up saved file
-            try:
-                if os.path.exists(file_path):
-                    os.remove(file_path)
-                    logger.debug(f"Cleaned up file after DB error: {file_path}")
-            except:
-                pass
+            await run_in_threadpool(remove_file_quietly, file_path)
+            logger.debug(f"Cleaned up file after DB error: {file_path}")
             raise HTTPException(status_code=500, detail=error_msg)
         
         # Extract pages with error handling
         try:
-            total_pages = PDFService.extract_and_save_pages(db, pdf_doc.id, file_path)
+            total_pages = await run_in_threadpool(PDFService.extract_and_save_pages, db, pdf_doc.id, file_path, file_hash)
             logger.info(f"Pages extracted successfully: {total_pages} pages")
         except Exception as e:
             error_msg = f"Failed to extract pages: {str(e)}"
@@ -148,41 +144,38 @@ async def upload_pdf(
         logger.error(error_msg, exc_info=True)
         raise HTTPException(status_code=500, detail="Internal server error during upload")
 
-@router.get("/{document_id}", response_model=dict)
-async def get_document(document_id: int, db: Session = Depends(get_db)):
+@router.get("/{document_id}", response_model=DocumentOut)
+def get_document(document_id: int, db: Session = Depends(get_db)):
     """Get document details"""
-    document = db.query(PDFDocument).filter(PDFDocument.id == document_id).first()
+    document = db.get(PDFDocument, document_id)
     if not document:
         raise HTTPException(404, "Document not found")
     
-    return {
-        "id": document.id,
-        "uuid": document.uuid,
-        "filename": document.original_filename,
-        "status": document.status,
-        "total_pages": document.total_pages,
-        "total_characters": document.total_characters,
-        "created_at": document.created_at
-    }
+    return document
 
-@router.get("/{document_id}/pages", response_model=List[dict])
-async def get_document_pages(document_id: int, db: Session = Depends(get_db)):
+@router.get("/{document_id}/pages")
+def get_document_pages(document_id: int):
     """Get all pages for a document"""
-    pages = db.query(PDFPage).filter(PDFPage.document_id == document_id).all()
+    # Project only the listed columns so page text is never loaded
+    def pages_query(db: Session):
+        return db.query(
+            PDFPage.id,
+            PDFPage.page_number,
+            PDFPage.char_count,
+            PDFPage.translation_status,
+            PDFPage.is_test_page,
+            PDFPage.created_at
+        ).filter(
+            PDFPage.document_id == document_id
+        ).order_by(PDFPage.page_number).yield_per(500)
     
-    return [{
-        "id": page.id,
-        "page_number": page.page_number,
-        "char_count": page.char_count,
-        "translation_status": page.translation_status,
-        "is_test_page": page.is_test_page,
-        "created_at": page.created_at
-    } for page in pages]
+    # Stream the JSON array row by row instead of building the full list first
+    return StreamingResponse(stream_json_rows(pages_query), media_type="application/json")
 
 @router.post("/{document_id}/translate")
-async def start_translation(document_id: int, db: Session = Depends(get_db)):
+def start_translation(document_id: int, db: Session = Depends(get_db)):
     """Start translation process for document"""
-    document = db.query(PDFDocument).filter(PDFDocument.id == document_id).first()
+    document = db.get(PDFDocument, document_id)
     if not document:
         raise HTTPException(404, "Document not found")
     
@@ -191,27 +184,42 @@ async def start_translation(document_id: int, db: Session = Depends(get_db)):
     
     return {"message": "Translation started", "task_id": task.id}
 
+def _mark_and_translate_test_page(
+    db: Session,
+    translation_service: TranslationService,
+    document_id: int,
+    page_number: int
+) -> Optional[PDFPage]:
+    """Flag a page as the test page and translate it; returns None if the page does not exist"""
+    page = PDFService.mark_page_as_test(db, document_id, page_number)
+    if not page:
+        return None
+    return translation_service.translate_page(db, page.id)
+
 @router.post("/{document_id}/pages/{page_number}/test")
 async def mark_test_page(
     document_id: int, 
     page_number: int, 
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    translation_service: TranslationService = Depends(get_translation_service)
 ):
     """Mark page as test page and translate it"""
     try:
-        page = PDFService.mark_page_as_test(db, document_id, page_number)
-        if not page:
+        # Mark and translate the test page off the event loop (blocking DB and OpenAI calls)
+        translated_page = await run_in_threadpool(
+            _mark_and_translate_test_page, db, translation_service, document_id, page_number
+        )
+        if not translated_page:
             raise HTTPException(404, "Page not found")
         
-        # Translate the test page
-        translation_service = TranslationService()
-        translated_page = translation_service.translate_page(db, page.id)
-        
         return {
             "message": "Test page translated",
             "page_number": page_number,
             "translated_text": translated_page.translated_text
         }
+    except HTTPException:
+        # Re-raise HTTP exceptions (e.g. 404) as-is
+        raise
     except ValueError as e:
         # Handle translation service errors (quota, auth, etc.)
         error_message = str(e)
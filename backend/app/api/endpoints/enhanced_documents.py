@@ -1,121 +1,199 @@
 # Enhanced API Endpoints for Semantic PDF Translation
 # backend/app/api/endpoints/enhanced_documents.py
 
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, BackgroundTasks
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, BackgroundTasks, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func
+from sqlalchemy.orm import Session, load_only
 from typing import List, Dict, Optional
 import os
 import uuid
+import hashlib
 import logging
 import traceback
 from datetime import datetime
 
+from app.api.deps import validate_pdf_upload
 from app.core.database import get_db
 from app.core.config import settings
+from app.core.files import remove_file_quietly
+from app.core.streaming import stream_json_rows
 from app.models.models import PDFDocument, PDFPage, SemanticStructure, SampleTranslation, TranslationJob
+from app.services.job_service import mark_job_failed
 from app.services.pdf_service import PDFService
-from app.services.pdf_service import PDFService as EnhancedPDFService
-from app.services.semantic_analyzer import SemanticAnalyzer
-from app.services.translation_service import TranslationService
-from app.workers.celery_worker import process_document_translation
+from app.services.pdf_service import PDFService as EnhancedPDFService, get_pdf_service
+from app.workers.celery_worker import (
+    process_document_translation,
+    process_sample_translation,
+    process_semantic_analysis,
+)
 import aiofiles
+import orjson
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Background jobs that share the translation_jobs table but are not translations
+NON_TRANSLATION_JOB_TYPES = ("semantic_analysis", "sample")
+
+def _ensure_document_exists(db: Session, document_id: int) -> None:
+    """Raise 404 unless the document exists, selecting only its id"""
+    if db.query(PDFDocument.id).filter(PDFDocument.id == document_id).scalar() is None:
+        raise HTTPException(404, "Document not found")
+
+def _enqueue_job(db: Session, job: TranslationJob, task, *args, **kwargs) -> TranslationJob:
+    """Save a queued job and hand it to celery, marking the job failed if enqueueing does not succeed"""
+    db.add(job)
+    db.commit()
+    
+    try:
+        async_result = task.delay(*args, job_id=job.id, **kwargs)
+        job.celery_task_id = async_result.id
+        db.commit()
+    except Exception as e:
+        mark_job_failed(db, job, e)
+        raise
+    return job
+
+def _truncate(text: Optional[str], length: int = 200) -> Optional[str]:
+    """Cut text to length characters, marking the cut with an ellipsis"""
+    if text is None or len(text) <= length:
+        return text
+    return text[:length] + "..."
+
+def _drop_from_page_cache(file_path: str) -> None:
+    """Advise the kernel to evict a processed upload from the page cache (Linux only)"""
+    if not hasattr(os, "posix_fadvise"):
+        return
+    try:
+        fd = os.open(file_path, os.O_RDONLY)
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+    except OSError as e:
+        logger.debug(f"posix_fadvise skipped for {file_path}: {str(e)}")
+
+def _save_basic_document(
+    db: Session,
+    filename: str,
+    original_filename: str,
+    file_path: str,
+    file_hash: str,
+    file_size_bytes: int
+) -> PDFDocument:
+    """Save a document and its plain-text pages without enhanced layout analysis"""
+    # Discard whatever the failed enhanced attempt left in the session
+    db.rollback()
+    
+    pdf_doc = PDFDocument(
+        filename=filename,
+        original_filename=original_filename,
+        file_path=file_path,
+        file_size_bytes=file_size_bytes,
+        status="uploaded"
+    )
+    
+    db.add(pdf_doc)
+    db.commit()
+    db.refresh(pdf_doc)
+    
+    logger.info(f"Basic document saved to database: id={pdf_doc.id}, uuid={pdf_doc.uuid}")
+    
+    # Extract pages and basic info
+    try:
+        total_pages = PDFService.extract_and_save_pages(db, pdf_doc.id, file_path, file_hash)
+        logger.info(f"Pages extracted successfully: {total_pages} pages")
+    except Exception as page_error:
+        logger.warning(f"Failed to extract pages: {str(page_error)}", exc_info=True)
+        db.rollback()
+        total_pages = 0
+    
+    # Update document with page count
+    pdf_doc.total_pages = total_pages
+    db.commit()
+    return pdf_doc
+
 @router.post("/upload-enhanced", response_model=dict)
 async def upload_pdf_enhanced(
-    file: UploadFile = File(...),
-    db: Session = Depends(get_db)
+    file: UploadFile = Depends(validate_pdf_upload),
+    db: Session = Depends(get_db),
+    enhanced_service: EnhancedPDFService = Depends(get_pdf_service)
 ):
     """Upload PDF document with enhanced processing and layout preservation"""
     
     # Log upload attempt
-    safe_size = getattr(file, "size", None)
-    logger.info(f"Enhanced upload attempt started: filename={file.filename}, content_type={file.content_type}, size={safe_size}")
+    logger.info(f"Enhanced upload attempt started: filename={file.filename}, content_type={file.content_type}, size={getattr(file, 'size', None)}")
     
     try:
-        # Enhanced file validation
-        if not file.filename:
-            error_msg = "No filename provided"
-            logger.error(error_msg)
-            raise HTTPException(status_code=400, detail=error_msg)
-        
-        if not file.filename.lower().endswith('.pdf'):
-            error_msg = f"Only PDF files are allowed. Received: {file.filename}"
-            logger.error(error_msg)
-            raise HTTPException(status_code=400, detail=error_msg)
-        
-        # Check file size
-        if safe_size is not None and safe_size > settings.MAX_FILE_SIZE:
-            error_msg = f"File too large. Maximum size: {settings.MAX_FILE_SIZE} bytes, received: {file.size} bytes"
-            logger.error(error_msg)
-            raise HTTPException(status_code=413, detail=error_msg)
-        
-        # Check if file is empty
-        if safe_size == 0:
-            error_msg = "File is empty"
-            logger.error(error_msg)
-            raise HTTPException(status_code=400, detail=error_msg)
-        
-        # Create upload directory if not exists
-        try:
-            os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
-            logger.debug(f"Upload directory ensured: {settings.UPLOAD_DIR}")
-        except Exception as e:
-            error_msg = f"Failed to create upload directory: {str(e)}"
-            logger.error(error_msg)
-            raise HTTPException(status_code=500, detail=error_msg)
-        
         # Generate unique filename
-        file_id = str(uuid.uuid4())
+        file_id = uuid.uuid4().hex
         filename = f"{file_id}.pdf"
         file_path = os.path.join(settings.UPLOAD_DIR, filename)
         
         logger.info(f"Generated file path: {file_path}")
         
-        # Save file with error handling
+        # Stream file to disk in fixed-size chunks
+        actual_size = 0
+        hasher = hashlib.blake2b(digest_size=32)
         try:
             async with aiofiles.open(file_path, 'wb') as f:
-                content = await file.read()
-                await f.write(content)
-            
-            # Verify file was written correctly
-            if not os.path.exists(file_path):
-                error_msg = "File was not saved successfully"
-                logger.error(error_msg)
-                raise HTTPException(status_code=500, detail=error_msg)
-            
-            actual_size = os.path.getsize(file_path)
-            if actual_size != len(content):
-                error_msg = f"File size mismatch. Expected: {len(content)}, Actual: {actual_size}"
-                logger.error(error_msg)
-                raise HTTPException(status_code=500, detail=error_msg)
-            
-            logger.info(f"File saved successfully: {file_path}, size: {actual_size} bytes")
+                while chunk := await file.read(settings.UPLOAD_CHUNK_SIZE):
+                    actual_size += len(chunk)
+                    if actual_size > settings.MAX_FILE_SIZE:
+                        break
+                    hasher.update(chunk)
+                    await f.write(chunk)
             
         except Exception as e:
             error_msg = f"Failed to save file: {str(e)}"
             logger.error(error_msg, exc_info=True)
             # Clean up partial file
-            if os.path.exists(file_path):
-                try:
-                    os.remove(file_path)
-                    logger.debug(f"Cleaned up partial file: {file_path}")
-                except:
-                    pass
+            await run_in_threadpool(remove_file_quietly, file_path)
+            logger.debug(f"Cleaned up partial file: {file_path}")
             raise HTTPException(status_code=500, detail=error_msg)
         
+        # Reject oversized uploads as soon as the limit is crossed
+        if actual_size > settings.MAX_FILE_SIZE:
+            error_msg = f"File too large. Maximum size: {settings.MAX_FILE_SIZE} bytes"
+            logger.error(error_msg)
+            await run_in_threadpool(remove_file_quietly, file_path)
+            logger.debug(f"Cleaned up oversized file: {file_path}")
+            raise HTTPException(status_code=413, detail=error_msg)
+        
+        logger.info(f"File saved successfully: {file_path}, size: {actual_size} bytes")
+        
+        # Skip reprocessing when identical content already went through enhanced processing
+        file_hash = hasher.hexdigest()
+        existing_doc = await run_in_threadpool(
+            PDFService.find_processed_duplicate, db, file_hash, enhanced=True
+        )
+        if existing_doc:
+            logger.info(f"Duplicate upload of document_id={existing_doc.id}, discarding {file_path}")
+            await run_in_threadpool(remove_file_quietly, file_path)
+            
+            return {
+                "message": "File already uploaded",
+                "document_id": existing_doc.id,
+                "uuid": existing_doc.uuid,
+                "total_pages": existing_doc.total_pages,
+                "file_size_bytes": actual_size,
+                "duplicate": True
+            }
+        
         # Try enhanced processing first
         try:
             logger.info("Attempting enhanced PDF processing")
-            enhanced_service = EnhancedPDFService()
-            pdf_doc = enhanced_service.save_enhanced_pdf_to_db(db, filename, file.filename, file_path)
+            pdf_doc = await run_in_threadpool(enhanced_service.save_enhanced_pdf_to_db, db, filename, file.filename, file_path, file_hash)
             
             logger.info(f"Enhanced processing successful: document_id={pdf_doc.id}")
             
+            # Extraction is done, so the upload no longer needs to stay cached
+            await run_in_threadpool(_drop_from_page_cache, file_path)
+            
             return {
                 "message": "File uploaded successfully with enhanced processing",
                 "document_id": pdf_doc.id,
@@ -131,34 +209,15 @@ async def upload_pdf_enhanced(
             logger.warning(f"Enhanced processing failed, falling back to basic: {str(e)}", exc_info=True)
             
             try:
-                pdf_doc = PDFDocument(
-                    filename=filename,
-                    original_filename=file.filename,
-                    file_path=file_path,
-                    file_size_bytes=actual_size,
-                    status="uploaded"
+                pdf_doc = await run_in_threadpool(
+                    _save_basic_document, db, filename, file.filename, file_path, file_hash, actual_size
                 )
-                
-                db.add(pdf_doc)
-                db.commit()
-                db.refresh(pdf_doc)
-                
-                logger.info(f"Basic document saved to database: id={pdf_doc.id}, uuid={pdf_doc.uuid}")
-                
-                # Extract pages and basic info
-                try:
-                    total_pages = PDFService.extract_and_save_pages(db, pdf_doc.id, file_path)
-                    logger.info(f"Pages extracted successfully: {total_pages} pages")
-                except Exception as page_error:
-                    logger.warning(f"Failed to extract pages: {str(page_error)}", exc_info=True)
-                    total_pages = 0
-                
-                # Update document with page count
-                pdf_doc.total_pages = total_pages
-                db.commit()
+                total_pages = pdf_doc.total_pages
                 
                 logger.info(f"Basic upload completed successfully: document_id={pdf_doc.id}")
                 
+                await run_in_threadpool(_drop_from_page_cache, file_path)
+                
                 return {
                     "message": "File uploaded successfully (basic processing)",
                     "document_id": pdf_doc.id,
@@ -174,12 +233,8 @@ async def upload_pdf_enhanced(
                 error_msg = f"Both enhanced and basic processing failed: {str(basic_error)}"
                 logger.error(error_msg, exc_info=True)
                 # Clean up saved file
-                try:
-                    if os.path.exists(file_path):
-                        os.remove(file_path)
-                        logger.debug(f"Cleaned up file after processing error: {file_path}")
-                except:
-                    pass
+                await run_in_threadpool(remove_file_quietly, file_path)
+                logger.debug(f"Cleaned up file after processing error: {file_path}")
                 raise HTTPException(status_code=500, detail=error_msg)
         
     except HTTPException:
@@ -191,118 +246,107 @@ async def upload_pdf_enhanced(
         logger.error(error_msg, exc_info=True)
         raise HTTPException(status_code=500, detail="Internal server error during enhanced upload")
 
-@router.post("/analyze-semantic/{document_id}")
-async def analyze_semantic_structure(
+@router.post("/analyze-semantic/{document_id}", status_code=202)
+def analyze_semantic_structure(
     document_id: int, 
+    response: Response,
+    force: bool = False,
     db: Session = Depends(get_db)
 ):
-    """Run comprehensive semantic analysis on document"""
-    document = db.query(PDFDocument).filter(PDFDocument.id == document_id).first()
+    """Queue comprehensive semantic analysis on document (skipped if already analyzed unless force=true)"""
+    document = db.get(PDFDocument, document_id)
     if not document:
         raise HTTPException(404, "Document not found")
     
-    try:
-        # Initialize semantic analyzer
-        analyzer = SemanticAnalyzer()
-        
-        # Analyze document structure
-        document_structures = analyzer.analyze_document_structure(document.file_path)
-        
-        # Update document with analysis results
-        document.text_density_score = 0.8  # Placeholder
-        document.layout_complexity_score = 0.7  # Placeholder
-        document.academic_term_count = sum(len(structures) for structures in document_structures.values())
-        document.analysis_completed = True
-        
-        db.commit()
-        
-        # Store semantic structures in database
-        pages = db.query(PDFPage).filter(PDFPage.document_id == document_id).all()
-        
-        for page in pages:
-            # Update page with semantic structures
-            page.sentences = document_structures.get("sentences", [])
-            page.paragraphs = document_structures.get("paragraphs", [])
-            page.sections = document_structures.get("sections", [])
-            page.chapters = document_structures.get("chapters", [])
-            
-            # Calculate page metrics
-            page.sentence_count = len(page.sentences)
-            page.paragraph_count = len(page.paragraphs)
-            page.word_count = sum(s.get("word_count", 0) for s in page.sentences)
-            
-            # Calculate complexity score
-            if page.sentences:
-                page.complexity_score = sum(s.get("complexity_score", 0) for s in page.sentences) / len(page.sentences)
-            
-            db.commit()
-        
+    if document.analysis_completed and not force:
+        # Report the stored per-page counters instead of re-running the analyzer
+        sentence_total, paragraph_total = db.query(
+            func.coalesce(func.sum(PDFPage.sentence_count), 0),
+            func.coalesce(func.sum(PDFPage.paragraph_count), 0)
+        ).filter(PDFPage.document_id == document_id).one()
+        
+        response.status_code = 200
         return {
-            "message": "Semantic analysis completed",
+            "message": "Already analyzed",
             "document_id": document_id,
+            "status": "completed",
             "structures_found": {
-                "sentences": len(document_structures.get("sentences", [])),
-                "paragraphs": len(document_structures.get("paragraphs", [])),
-                "sections": len(document_structures.get("sections", [])),
-                "chapters": len(document_structures.get("chapters", [])),
-                "tables": len(document_structures.get("tables", [])),
-                "columns": len(document_structures.get("columns", []))
+                "sentences": sentence_total,
+                "paragraphs": paragraph_total
             }
         }
+    
+    try:
+        # Create analysis job and start celery task for semantic analysis
+        job = _enqueue_job(db, TranslationJob(
+            document_id=document_id,
+            job_type="semantic_analysis",
+            status="queued",
+            total_pages=document.total_pages
+        ), process_semantic_analysis, document_id)
+        
+        return {
+            "message": "Semantic analysis queued",
+            "document_id": document_id,
+            "job_id": job.id,
+            "task_id": job.celery_task_id,
+            "status": "queued"
+        }
         
     except Exception as e:
-        raise HTTPException(500, f"Analysis failed: {str(e)}")
+        raise HTTPException(500, f"Failed to queue semantic analysis: {str(e)}")
 
 @router.get("/semantic-structure/{document_id}")
-async def get_semantic_structure(
+def get_semantic_structure(
     document_id: int,
     db: Session = Depends(get_db)
 ):
     """Get semantic structure analysis results"""
-    document = db.query(PDFDocument).filter(PDFDocument.id == document_id).first()
+    document = db.get(PDFDocument, document_id)
     if not document:
         raise HTTPException(404, "Document not found")
     
     if not document.analysis_completed:
         raise HTTPException(400, "Semantic analysis not completed")
     
-    pages = db.query(PDFPage).filter(PDFPage.document_id == document_id).all()
-    
-    structure_summary = {
+    header = orjson.dumps({
         "document_id": document_id,
         "total_pages": document.total_pages,
-        "analysis_completed": document.analysis_completed,
-        "pages": []
-    }
+        "analysis_completed": document.analysis_completed
+    })
     
-    for page in pages:
-        page_structure = {
-            "page_number": page.page_number,
-            "sentences": page.sentences,
-            "paragraphs": page.paragraphs,
-            "sections": page.sections,
-            "chapters": page.chapters,
-            "complexity_score": page.complexity_score,
-            "word_count": page.word_count,
-            "sentence_count": page.sentence_count,
-            "paragraph_count": page.paragraph_count
-        }
-        structure_summary["pages"].append(page_structure)
+    # Single projected query; page text and tracked ORM objects are not needed
+    def pages_query(stream_db: Session):
+        return stream_db.query(
+            PDFPage.page_number,
+            PDFPage.sentences,
+            PDFPage.paragraphs,
+            PDFPage.sections,
+            PDFPage.chapters,
+            PDFPage.complexity_score,
+            PDFPage.word_count,
+            PDFPage.sentence_count,
+            PDFPage.paragraph_count
+        ).filter(
+            PDFPage.document_id == document_id
+        ).order_by(PDFPage.page_number).yield_per(64)
     
-    return structure_summary
+    # Stream one page at a time instead of building the whole summary in memory
+    return StreamingResponse(
+        stream_json_rows(pages_query, prefix=header[:-1] + b',"pages":[', suffix=b"]}"),
+        media_type="application/json"
+    )
 
-@router.post("/translate-sample/{document_id}/page/{page_number}")
-async def translate_sample_page(
+@router.post("/translate-sample/{document_id}/page/{page_number}", status_code=202)
+def translate_sample_page(
     document_id: int,
     page_number: int,
     db: Session = Depends(get_db)
 ):
-    """Translate a sample page for testing"""
-    document = db.query(PDFDocument).filter(PDFDocument.id == document_id).first()
-    if not document:
-        raise HTTPException(404, "Document not found")
+    """Queue a sample page translation for testing"""
+    _ensure_document_exists(db, document_id)
     
-    page = db.query(PDFPage).filter(
+    page = db.query(PDFPage).options(load_only(PDFPage.id)).filter(
         PDFPage.document_id == document_id,
         PDFPage.page_number == page_number
     ).first()
@@ -311,55 +355,31 @@ async def translate_sample_page(
         raise HTTPException(404, "Page not found")
     
     try:
-        # Initialize translation service
-        translation_service = TranslationService()
-        
-        # Translate the page
-        translated_page = translation_service.translate_page(db, page.id)
-        
-        # Create sample translation record
-        sample_translation = SampleTranslation(
-            document_id=document_id,
-            page_id=page.id,
-            sample_type="page",
-            sample_text=page.original_text,
-            translated_text=translated_page.translated_text,
-            cost_estimate=translated_page.cost_estimate,
-            processing_time=translated_page.translation_time,
-            quality_score=0.9  # Placeholder
-        )
-        
-        db.add(sample_translation)
-        db.commit()
+        job = _queue_sample_translation(db, document_id, page.id)
         
         return {
-            "message": "Sample page translation completed",
+            "message": "Sample page translation queued",
             "document_id": document_id,
             "page_number": page_number,
-            "original_text": page.original_text[:500] + "..." if len(page.original_text) > 500 else page.original_text,
-            "translated_text": translated_page.translated_text[:500] + "..." if len(translated_page.translated_text) > 500 else translated_page.translated_text,
-            "cost_estimate": translated_page.cost_estimate,
-            "processing_time": translated_page.translation_time,
-            "quality_score": 0.9,
-            "sample_id": sample_translation.id
+            "job_id": job.id,
+            "task_id": job.celery_task_id,
+            "status": "queued"
         }
         
     except Exception as e:
-        raise HTTPException(500, f"Sample translation failed: {str(e)}")
+        raise HTTPException(500, f"Failed to queue sample translation: {str(e)}")
 
-@router.post("/translate-sample/{document_id}/paragraph/{paragraph_index}")
-async def translate_sample_paragraph(
+@router.post("/translate-sample/{document_id}/paragraph/{paragraph_index}", status_code=202)
+def translate_sample_paragraph(
     document_id: int,
     paragraph_index: int,
     page_number: int,
     db: Session = Depends(get_db)
 ):
-    """Translate a sample paragraph for testing"""
-    document = db.query(PDFDocument).filter(PDFDocument.id == document_id).first()
-    if not document:
-        raise HTTPException(404, "Document not found")
+    """Queue a sample paragraph translation for testing"""
+    _ensure_document_exists(db, document_id)
     
-    page = db.query(PDFPage).filter(
+    page = db.query(PDFPage).options(load_only(PDFPage.id, PDFPage.paragraphs)).filter(
         PDFPage.document_id == document_id,
         PDFPage.page_number == page_number
     ).first()
@@ -370,62 +390,68 @@ async def translate_sample_paragraph(
     if not page.paragraphs or paragraph_index >= len(page.paragraphs):
         raise HTTPException(404, "Paragraph not found")
     
+    if not page.paragraphs[paragraph_index].get("text", ""):
+        raise HTTPException(400, "Paragraph text is empty")
+    
     try:
-        paragraph_data = page.paragraphs[paragraph_index]
-        paragraph_text = paragraph_data.get("text", "")
-        
-        if not paragraph_text:
-            raise HTTPException(400, "Paragraph text is empty")
-        
-        # Initialize translation service
-        translation_service = TranslationService()
-        
-        # Translate the paragraph
-        translated_text = translation_service.translate_text(paragraph_text)
-        cost_estimate = translation_service.estimate_cost(paragraph_text)
-        
-        # Create sample translation record
-        sample_translation = SampleTranslation(
-            document_id=document_id,
-            page_id=page.id,
-            sample_type="paragraph",
-            sample_text=paragraph_text,
-            translated_text=translated_text,
-            cost_estimate=cost_estimate,
-            processing_time=0.5,  # Placeholder
-            quality_score=0.9  # Placeholder
-        )
-        
-        db.add(sample_translation)
-        db.commit()
+        job = _queue_sample_translation(db, document_id, page.id, paragraph_index)
         
         return {
-            "message": "Sample paragraph translation completed",
+            "message": "Sample paragraph translation queued",
             "document_id": document_id,
             "page_number": page_number,
             "paragraph_index": paragraph_index,
-            "original_text": paragraph_text,
-            "translated_text": translated_text,
-            "cost_estimate": cost_estimate,
-            "processing_time": 0.5,
-            "quality_score": 0.9,
-            "sample_id": sample_translation.id
+            "job_id": job.id,
+            "task_id": job.celery_task_id,
+            "status": "queued"
         }
         
     except Exception as e:
-        raise HTTPException(500, f"Sample paragraph translation failed: {str(e)}")
+        raise HTTPException(500, f"Failed to queue sample paragraph translation: {str(e)}")
+
+def _queue_sample_translation(
+    db: Session,
+    document_id: int,
+    page_id: int,
+    paragraph_index: Optional[int] = None
+) -> TranslationJob:
+    """Create a sample translation job and hand it to the celery worker"""
+    return _enqueue_job(db, TranslationJob(
+        document_id=document_id,
+        job_type="sample",
+        status="queued",
+        total_pages=1
+    ), process_sample_translation, page_id, paragraph_index=paragraph_index)
 
 @router.get("/sample-translations/{document_id}")
-async def get_sample_translations(
+def get_sample_translations(
     document_id: int,
+    preview: bool = True,
     db: Session = Depends(get_db)
 ):
-    """Get all sample translations for a document"""
-    document = db.query(PDFDocument).filter(PDFDocument.id == document_id).first()
-    if not document:
-        raise HTTPException(404, "Document not found")
+    """Get all sample translations for a document (texts cut to 200 chars unless preview=false)"""
+    _ensure_document_exists(db, document_id)
+    
+    if preview:
+        # Fetch one character past the 200-char preview so long texts can be
+        # detected without pulling full sample bodies from the database
+        sample_text_column = func.substr(SampleTranslation.sample_text, 1, 201).label("sample_text")
+        translated_text_column = func.substr(SampleTranslation.translated_text, 1, 201).label("translated_text")
+    else:
+        sample_text_column = SampleTranslation.sample_text
+        translated_text_column = SampleTranslation.translated_text
     
-    sample_translations = db.query(SampleTranslation).filter(
+    sample_translations = db.query(
+        SampleTranslation.id,
+        SampleTranslation.sample_type,
+        sample_text_column,
+        translated_text_column,
+        SampleTranslation.cost_estimate,
+        SampleTranslation.processing_time,
+        SampleTranslation.quality_score,
+        SampleTranslation.user_approved,
+        SampleTranslation.created_at
+    ).filter(
         SampleTranslation.document_id == document_id
     ).all()
     
@@ -435,8 +461,8 @@ async def get_sample_translations(
             {
                 "id": sample.id,
                 "sample_type": sample.sample_type,
-                "sample_text": sample.sample_text[:200] + "..." if len(sample.sample_text) > 200 else sample.sample_text,
-                "translated_text": sample.translated_text[:200] + "..." if len(sample.translated_text) > 200 else sample.translated_text,
+                "sample_text": _truncate(sample.sample_text) if preview else sample.sample_text,
+                "translated_text": _truncate(sample.translated_text) if preview else sample.translated_text,
                 "cost_estimate": sample.cost_estimate,
                 "processing_time": sample.processing_time,
                 "quality_score": sample.quality_score,
@@ -448,13 +474,13 @@ async def get_sample_translations(
     }
 
 @router.post("/approve-sample/{sample_id}")
-async def approve_sample_translation(
+def approve_sample_translation(
     sample_id: int,
     feedback: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
     """Approve a sample translation"""
-    sample = db.query(SampleTranslation).filter(SampleTranslation.id == sample_id).first()
+    sample = db.get(SampleTranslation, sample_id)
     if not sample:
         raise HTTPException(404, "Sample translation not found")
     
@@ -471,12 +497,12 @@ async def approve_sample_translation(
     }
 
 @router.get("/preserve-format/{page_id}")
-async def get_format_preservation_options(
+def get_format_preservation_options(
     page_id: int,
     db: Session = Depends(get_db)
 ):
     """Get format preservation options for a page"""
-    page = db.query(PDFPage).filter(PDFPage.id == page_id).first()
+    page = db.query(PDFPage).options(load_only(PDFPage.id, PDFPage.page_number)).filter(PDFPage.id == page_id).first()
     if not page:
         raise HTTPException(404, "Page not found")
     
@@ -500,14 +526,14 @@ async def get_format_preservation_options(
     return format_options
 
 @router.post("/gradual-translate/{document_id}")
-async def start_gradual_translation(
+def start_gradual_translation(
     document_id: int,
     strategy: str = "semantic",
     selected_pages: Optional[List[int]] = None,
     db: Session = Depends(get_db)
 ):
     """Start gradual translation with user control"""
-    document = db.query(PDFDocument).filter(PDFDocument.id == document_id).first()
+    document = db.get(PDFDocument, document_id)
     if not document:
         raise HTTPException(404, "Document not found")
     
@@ -545,19 +571,24 @@ async def start_gradual_translation(
         raise HTTPException(500, f"Failed to start gradual translation: {str(e)}")
 
 @router.get("/translation-progress/{document_id}")
-async def get_translation_progress(
+def get_translation_progress(
     document_id: int,
     db: Session = Depends(get_db)
 ):
     """Get real-time translation progress"""
-    document = db.query(PDFDocument).filter(PDFDocument.id == document_id).first()
-    if not document:
+    # Existence check and latest translation job in a single round-trip
+    row = db.query(PDFDocument.id, TranslationJob).outerjoin(
+        TranslationJob,
+        (TranslationJob.document_id == PDFDocument.id)
+        & TranslationJob.job_type.notin_(NON_TRANSLATION_JOB_TYPES)
+    ).filter(
+        PDFDocument.id == document_id
+    ).order_by(TranslationJob.created_at.desc().nulls_last()).first()
+    
+    if not row:
         raise HTTPException(404, "Document not found")
     
-    # Get latest translation job
-    job = db.query(TranslationJob).filter(
-        TranslationJob.document_id == document_id
-    ).order_by(TranslationJob.created_at.desc()).first()
+    job = row.TranslationJob
     
     if not job:
         return {
@@ -582,3 +613,24 @@ async def get_translation_progress(
         "started_at": job.started_at,
         "completed_at": job.completed_at
     }
+
+@router.get("/jobs/{job_id}")
+def get_job_status(
+    job_id: int,
+    db: Session = Depends(get_db)
+):
+    """Get status and results of a queued analysis or translation job"""
+    job = db.get(TranslationJob, job_id)
+    if not job:
+        raise HTTPException(404, "Job not found")
+    
+    return {
+        "job_id": job.id,
+        "document_id": job.document_id,
+        "job_type": job.job_type,
+        "status": job.status,
+        "results_summary": job.results_summary,
+        "error_log": job.error_log,
+        "started_at": job.started_at,
+        "completed_at": job.completed_at
+    }
@@ -1,9 +1,29 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from .config import settings
 
-engine = create_engine(settings.DATABASE_URL)
+engine_kwargs = {}
+if make_url(settings.DATABASE_URL).get_backend_name() == "postgresql":
+    # Send bulk UPDATEs through psycopg2's execute_batch (INSERTs already use multi-row VALUES)
+    engine_kwargs.update(
+        executemany_mode="values_plus_batch",
+        insertmanyvalues_page_size=1000,
+        executemany_batch_page_size=500,
+    )
+    # Keep enough connections for concurrent requests and drop stale ones before use
+    engine_kwargs.update(
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_pre_ping=True,
+        # Label sessions in pg_stat_activity; JIT compilation only adds latency to these short queries
+        connect_args={"application_name": settings.DB_APPLICATION_NAME, "options": "-c jit=off"},
+    )
+
+engine = create_engine(settings.DATABASE_URL, **engine_kwargs)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
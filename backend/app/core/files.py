@@ -0,0 +1,9 @@
+import os
+
+
+def remove_file_quietly(file_path: str) -> None:
+    """Delete a file if present, ignoring errors"""
+    try:
+        os.remove(file_path)
+    except OSError:
+        pass
@@ -0,0 +1,25 @@
+from typing import Callable, Iterator
+
+import orjson
+from sqlalchemy.orm import Query, Session
+
+from .database import SessionLocal
+
+def stream_json_rows(
+    query_factory: Callable[[Session], Query],
+    prefix: bytes = b"[",
+    suffix: bytes = b"]"
+) -> Iterator[bytes]:
+    """Yield the rows of a column-projected query as a JSON array, one row at a time
+    
+    The response body is sent after the handler returns, so the stream must not depend
+    on the request-scoped session; it opens and closes its own.
+    """
+    db = SessionLocal()
+    try:
+        yield prefix
+        for index, row in enumerate(query_factory(db)):
+            yield (b"," if index else b"") + orjson.dumps(dict(row._mapping))
+        yield suffix
+    finally:
+        db.close()
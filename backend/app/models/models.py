@@ -1,7 +1,7 @@
 # Enhanced Database Models for Semantic PDF Translation
 # backend/app/models/enhanced_models.py
 
-from sqlalchemy import Column, Integer, String, Text, DateTime, JSON, Boolean, Float, BigInteger, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, JSON, Boolean, Float, BigInteger, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import uuid
@@ -19,6 +19,7 @@ class PDFDocument(Base):
     filename = Column(String(255), nullable=False)
     original_filename = Column(String(255), nullable=False)
     file_path = Column(String(500), nullable=False)
+    file_hash = Column(String(64), index=True)  # BLAKE2b-256 of the uploaded bytes
     
     # Document metrics
     total_pages = Column(Integer, default=0)
@@ -59,6 +60,9 @@ class PDFDocument(Base):
 
 class PDFPage(Base):
     __tablename__ = "pdf_pages"
+    __table_args__ = (
+        Index("ix_pdf_pages_document_id_page_number", "document_id", "page_number", unique=True),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     document_id = Column(Integer, ForeignKey("pdf_documents.id"), index=True)
@@ -83,7 +87,8 @@ class PDFPage(Base):
     proper_nouns = Column(JSON, default=list)
     technical_terms = Column(JSON, default=list)
     # Generic per-page metadata for auxiliary processing/validation results
-    metadata = Column(JSON, default=dict)
+    # "metadata" is reserved on declarative classes, so the column is mapped under another attribute name
+    page_metadata = Column("metadata", JSON, default=dict)
     
     # Complexity metrics
     readability_score = Column(Float, default=0.0)
@@ -155,6 +160,9 @@ class SemanticStructure(Base):
 
 class TranslationJob(Base):
     __tablename__ = "translation_jobs"
+    __table_args__ = (
+        Index("ix_translation_jobs_document_id_created_at", "document_id", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     document_id = Column(Integer, ForeignKey("pdf_documents.id"), index=True)
@@ -0,0 +1,25 @@
+# Background job bookkeeping shared by the API and the Celery workers
+# backend/app/services/job_service.py
+
+import logging
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app.models.models import TranslationJob
+
+logger = logging.getLogger(__name__)
+
+def mark_job_failed(db: Session, job: Optional[TranslationJob], error: Exception):
+    """Record a background job failure without masking the original error"""
+    if job is None:
+        return
+    try:
+        db.rollback()
+        job.status = "failed"
+        job.completed_at = datetime.utcnow()
+        job.error_log = (job.error_log or []) + [str(error)]
+        db.commit()
+    except Exception:
+        logger.exception("Failed to mark job as failed")
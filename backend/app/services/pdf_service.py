@@ -5,6 +5,7 @@ import fitz
 import pdfplumber
 import re
 import os
+from functools import lru_cache
 from typing import Dict, List, Tuple, Optional
 from dataclasses import dataclass
 import logging
@@ -14,6 +15,9 @@ from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# document_metadata["extraction_method"] of documents saved by the enhanced pipeline
+ENHANCED_EXTRACTION_METHOD = "enhanced_layout_preservation"
+
 @dataclass
 class LayoutElement:
     """Represents a layout element in the PDF"""
@@ -80,31 +84,52 @@ class PDFService:
         return pdf_doc
 
     @staticmethod
-    def extract_and_save_pages(db: Session, document_id: int, file_path: str):
+    def find_processed_duplicate(db: Session, file_hash: str, enhanced: bool = False) -> Optional[PDFDocument]:
+        """Return the oldest document with these bytes that the same pipeline fully processed
+        
+        file_hash is only stored once a document's pages are saved, so a match always has pages.
+        """
+        extraction_method = PDFDocument.document_metadata["extraction_method"].as_string()
+        return db.query(PDFDocument).filter(
+            PDFDocument.file_hash == file_hash,
+            extraction_method == ENHANCED_EXTRACTION_METHOD if enhanced else extraction_method.is_(None)
+        ).order_by(PDFDocument.id).first()
+
+    @staticmethod
+    def extract_and_save_pages(db: Session, document_id: int, file_path: str, file_hash: Optional[str] = None):
         """Extract text and save pages to database (basic method)"""
         pages = PDFService.extract_text_from_pdf(file_path)
-        total_chars = 0
+        total_chars = sum(page_data['char_count'] for page_data in pages)
         
-        for page_data in pages:
-            page = PDFPage(
-                document_id=document_id,
-                page_number=page_data['page_number'],
-                original_text=page_data['text'],
-                char_count=page_data['char_count'],
-                translation_status="pending"
-            )
-            total_chars += page_data['char_count']
-            db.add(page)
+        PDFService._bulk_insert_pages(db, document_id, [
+            {
+                "page_number": page_data['page_number'],
+                "original_text": page_data['text'],
+                "char_count": page_data['char_count']
+            }
+            for page_data in pages
+        ])
         
         # Update document with total characters
-        document = db.query(PDFDocument).filter(PDFDocument.id == document_id).first()
+        document = db.get(PDFDocument, document_id)
         if document:
             document.total_characters = total_chars
             document.status = "extracted"
+            # Record the content hash with the pages so only processed documents are deduplicated
+            if file_hash and pages:
+                document.file_hash = file_hash
             db.commit()
         
         return len(pages)
 
+    @staticmethod
+    def _bulk_insert_pages(db: Session, document_id: int, rows: List[Dict]):
+        """Insert a document's pending pages in one executemany batch"""
+        db.bulk_insert_mappings(PDFPage, [
+            {**row, "document_id": document_id, "translation_status": "pending"}
+            for row in rows
+        ])
+
     @staticmethod
     def mark_page_as_test(db: Session, document_id: int, page_number: int) -> PDFPage:
         """Mark a page as test page for translation"""
@@ -468,7 +493,7 @@ class PDFService:
             logger.warning(f"Error preserving formatting: {e}")
             return translated_text
     
-    def save_enhanced_pdf_to_db(self, db: Session, filename: str, original_filename: str, file_path: str) -> PDFDocument:
+    def save_enhanced_pdf_to_db(self, db: Session, filename: str, original_filename: str, file_path: str, file_hash: Optional[str] = None) -> PDFDocument:
         """Save PDF document to database with enhanced metadata"""
         try:
             # Extract enhanced content
@@ -482,7 +507,7 @@ class PDFService:
                 total_pages=enhanced_content.get('total_pages', 0),
                 status="uploaded",
                 document_metadata={
-                    'extraction_method': 'enhanced_layout_preservation',
+                    'extraction_method': ENHANCED_EXTRACTION_METHOD,
                     'layout_analysis': True,
                     'table_detection': True
                 }
@@ -492,7 +517,10 @@ class PDFService:
             db.commit()
             db.refresh(pdf_doc)
             
-            # Save pages with enhanced data
+            # Save pages with enhanced data; the hash is committed in the same
+            # transaction so a failed page insert never leaves a matchable duplicate
+            if enhanced_content.get('pages'):
+                pdf_doc.file_hash = file_hash
             self._save_enhanced_pages(db, pdf_doc.id, enhanced_content)
             
             return pdf_doc
@@ -506,26 +534,31 @@ class PDFService:
         try:
             pages_data = enhanced_content.get('pages', [])
             
+            page_rows = []
             for page_data in pages_data:
-                page = PDFPage(
-                    document_id=document_id,
-                    page_number=page_data['page_number'],
-                    original_text=page_data.get('text', ''),
-                    char_count=len(page_data.get('text', '')),
-                    word_count=len(page_data.get('text', '').split()),
-                    translation_status="pending",
-                    original_layout=page_data.get('layout', {}),
-                    preserved_formatting={
+                text = page_data.get('text', '')
+                page_rows.append({
+                    "page_number": page_data['page_number'],
+                    "original_text": text,
+                    "char_count": len(text),
+                    "word_count": len(text.split()),
+                    "original_layout": page_data.get('layout', {}),
+                    "preserved_formatting": {
                         'tables': page_data.get('tables', []),
                         'images': page_data.get('images', []),
                         'dimensions': page_data.get('dimensions')
                     }
-                )
-                
-                db.add(page)
+                })
             
+            self._bulk_insert_pages(db, document_id, page_rows)
             db.commit()
             
         except Exception as e:
             logger.error(f"Error saving enhanced pages: {e}")
-            raise
\ No newline at end of file
+            raise
+
+
+@lru_cache(maxsize=1)
+def get_pdf_service() -> PDFService:
+    """Return the shared PDFService used by request handlers"""
+    return PDFService()
@@ -8,9 +8,14 @@ from typing import Dict, List, Tuple, Optional
 from dataclasses import dataclass
 from enum import Enum
 import logging
+from functools import lru_cache
+from sqlalchemy.orm import Session
+from app.models.models import PDFDocument, PDFPage
 
 logger = logging.getLogger(__name__)
 
+PAGE_STRUCTURE_TYPES = ("sentences", "paragraphs", "sections", "chapters")
+
 class StructureType(Enum):
     SENTENCE = "sentence"
     PARAGRAPH = "paragraph"
@@ -73,6 +78,75 @@ class SemanticAnalyzer:
             logger.error(f"Error analyzing document structure: {e}")
             raise
     
+    def analyze_and_save_document(self, db: Session, document_id: int) -> Dict:
+        """Analyze a document and store each page's structures and metrics in one commit"""
+        document = db.get(PDFDocument, document_id)
+        if not document:
+            raise ValueError("Document not found")
+        
+        document_structures = self.analyze_document_structure(document.file_path)
+        
+        # Update document with analysis results
+        document.text_density_score = 0.8  # Placeholder
+        document.layout_complexity_score = 0.7  # Placeholder
+        structure_counts = {
+            structure_type: len(structures)
+            for structure_type, structures in document_structures.items()
+        }
+        document.academic_term_count = sum(structure_counts.values())
+        document.analysis_completed = True
+        
+        # Store each page's own semantic structures in database
+        structures_by_page, metrics_by_page = self._group_structures_by_page(document_structures)
+        empty_structures = {structure_type: [] for structure_type in PAGE_STRUCTURE_TYPES}
+        empty_metrics = {"word_count": 0, "complexity_total": 0}
+        page_rows = db.query(PDFPage.id, PDFPage.page_number).filter(PDFPage.document_id == document_id).all()
+        
+        page_updates = []
+        for page_id, page_number in page_rows:
+            structures = structures_by_page.get(page_number, empty_structures)
+            metrics = metrics_by_page.get(page_number, empty_metrics)
+            sentence_count = len(structures["sentences"])
+            
+            # Page metrics were accumulated while grouping, so sentences are not walked again
+            page_update = {
+                "id": page_id,
+                **structures,
+                "sentence_count": sentence_count,
+                "paragraph_count": len(structures["paragraphs"]),
+                "word_count": metrics["word_count"]
+            }
+            if sentence_count:
+                page_update["complexity_score"] = metrics["complexity_total"] / sentence_count
+            page_updates.append(page_update)
+        
+        # One bulk UPDATE and a single commit instead of a commit per page
+        db.bulk_update_mappings(PDFPage, page_updates)
+        db.commit()
+        
+        return structure_counts
+    
+    @staticmethod
+    def _group_structures_by_page(document_structures: Dict) -> Tuple[Dict[int, Dict[str, List[Dict]]], Dict[int, Dict[str, float]]]:
+        """Split document-level structures into per-page lists and sentence metrics keyed by page number"""
+        structures_by_page: Dict[int, Dict[str, List[Dict]]] = {}
+        metrics_by_page: Dict[int, Dict[str, float]] = {}
+        for structure_type in PAGE_STRUCTURE_TYPES:
+            for structure in document_structures.get(structure_type, []):
+                # Structures record 0-based page indexes; PDFPage.page_number is 1-based
+                page_number = structure["page_number"] + 1
+                page_structures = structures_by_page.setdefault(
+                    page_number,
+                    {page_structure_type: [] for page_structure_type in PAGE_STRUCTURE_TYPES}
+                )
+                page_structures[structure_type].append(structure)
+                
+                if structure_type == "sentences":
+                    page_metrics = metrics_by_page.setdefault(page_number, {"word_count": 0, "complexity_total": 0})
+                    page_metrics["word_count"] += structure.get("word_count", 0)
+                    page_metrics["complexity_total"] += structure.get("complexity_score", 0)
+        return structures_by_page, metrics_by_page
+    
     def analyze_page_structure(self, page, page_number: int) -> Dict:
         """Analyze semantic structure of a single page"""
         try:
@@ -85,8 +159,8 @@ class SemanticAnalyzer:
             paragraphs = self._extract_paragraphs(text, page_number)
             sections = self._extract_sections(text, page_number)
             chapters = self._extract_chapters(text, page_number)
-            tables = self._extract_tables(page, page_number)
-            columns = self._extract_columns(page, page_number)
+            tables = self._extract_tables(text, page_number)
+            columns = self._extract_columns(layout_info, page_number)
             
             return {
                 "sentences": sentences,
@@ -204,14 +278,12 @@ class SemanticAnalyzer:
         
         return chapters
     
-    def _extract_tables(self, page, page_number: int) -> List[Dict]:
-        """Extract tables from page"""
+    def _extract_tables(self, text: str, page_number: int) -> List[Dict]:
+        """Extract tables from page text"""
         tables = []
         
         try:
             # Look for table-like structures in text
-            text = page.get_text()
-            
             # Simple table detection based on patterns
             table_pattern = r'(?:^|\n)(?:\s*\w+\s*\|.*\|.*\n)+'
             table_matches = re.finditer(table_pattern, text, re.MULTILINE)
@@ -234,14 +306,12 @@ class SemanticAnalyzer:
         
         return tables
     
-    def _extract_columns(self, page, page_number: int) -> List[Dict]:
-        """Extract column information from page"""
+    def _extract_columns(self, layout_info: LayoutInfo, page_number: int) -> List[Dict]:
+        """Extract column information from the page layout"""
         columns = []
         
         try:
             # Analyze page layout for columns
-            layout_info = self._extract_layout_info(page)
-            
             if layout_info.column_count > 1:
                 columns.append({
                     "type": StructureType.COLUMN.value,
@@ -388,13 +458,14 @@ class SemanticAnalyzer:
             word_count = len(text.split())
             sentence_count = len(re.findall(r'[.!?]+', text))
             avg_words_per_sentence = word_count / max(sentence_count, 1)
+            lowered_text = text.lower()
             
             # Academic term density
-            academic_term_count = sum(1 for term in self.academic_terms if term.lower() in text.lower())
+            academic_term_count = sum(1 for term in self.academic_terms if term.lower() in lowered_text)
             academic_density = academic_term_count / max(word_count, 1)
             
             # Philosophical concept density
-            philosophical_count = sum(1 for concept in self.philosophical_concepts if concept.lower() in text.lower())
+            philosophical_count = sum(1 for concept in self.philosophical_concepts if concept.lower() in lowered_text)
             philosophical_density = philosophical_count / max(word_count, 1)
             
             # Calculate complexity score
@@ -434,3 +505,9 @@ class SemanticAnalyzer:
             "Werner Erhard", "Martin Heidegger", "Jean-Paul Sartre",
             "Friedrich Nietzsche", "Immanuel Kant", "Plato", "Aristotle"
         ]
+
+
+@lru_cache(maxsize=1)
+def get_semantic_analyzer() -> SemanticAnalyzer:
+    """Return the shared SemanticAnalyzer (term lists are loaded once)"""
+    return SemanticAnalyzer()
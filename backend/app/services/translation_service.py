@@ -1,5 +1,8 @@
 from openai import OpenAI
 import time
+import threading
+from collections import OrderedDict
+from functools import lru_cache
 from typing import Optional, Dict, List
 from app.core.config import settings
 import tqdm
@@ -12,10 +15,15 @@ import tiktoken
 logger = logging.getLogger(__name__)
 
 class TranslationService:
+    _client: Optional[OpenAI] = None
+    
+    # The service is shared per process, so cached translations are capped (least recently used are dropped)
+    TRANSLATION_CACHE_SIZE = 256
+    
     def __init__(self):
-        self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
         self.model = settings.OPENAI_MODEL
-        self.translation_cache = {}
+        self.translation_cache: "OrderedDict[str, str]" = OrderedDict()
+        self._cache_lock = threading.Lock()
         self.persian_processor = PersianTextProcessor()
         self.tokenizer = tiktoken.get_encoding("cl100k_base")
         
@@ -38,6 +46,25 @@ Text to translate: {text}
 Persian Translation:
 """
 
+    @classmethod
+    def get_client(cls) -> OpenAI:
+        """Return the OpenAI client shared by all instances (reuses its HTTP connection pool)"""
+        if cls._client is None:
+            cls._client = OpenAI(api_key=settings.OPENAI_API_KEY)
+        return cls._client
+    
+    @property
+    def client(self) -> OpenAI:
+        """Resolve the shared client on every use so a closed client is never kept around"""
+        return self.get_client()
+    
+    @classmethod
+    def close_client(cls):
+        """Close the shared OpenAI client, if one was created"""
+        if cls._client is not None:
+            cls._client.close()
+            cls._client = None
+
     def estimate_cost(self, text: str) -> float:
         """Estimate translation cost using accurate token counting"""
         try:
@@ -61,21 +88,41 @@ Persian Translation:
             cost_per_char = 1.50 / (1_000_000 * 4)
             return char_count * cost_per_char * 1.3  # Persian expansion factor
 
-    def translate_text(self, text: str, max_retries: int = 3) -> str:
+    def _get_cached_translation(self, cache_key: str) -> Optional[str]:
+        """Return a cached translation and mark it as recently used"""
+        with self._cache_lock:
+            translated_text = self.translation_cache.get(cache_key)
+            if translated_text is not None:
+                self.translation_cache.move_to_end(cache_key)
+            return translated_text
+    
+    def _cache_translation(self, cache_key: str, translated_text: str):
+        """Cache a translation, evicting the least recently used entries past the cap"""
+        with self._cache_lock:
+            self.translation_cache[cache_key] = translated_text
+            self.translation_cache.move_to_end(cache_key)
+            while len(self.translation_cache) > self.TRANSLATION_CACHE_SIZE:
+                self.translation_cache.popitem(last=False)
+
+    def translate_text(self, text: str, max_retries: int = 3, use_cache: bool = True) -> str:
         """Translate text using OpenAI API with Persian optimization"""
         if not text.strip():
             return ""
         
-        # Check cache
-        cache_key = f"persian_{hash(text)}"
-        if cache_key in self.translation_cache:
-            return self.translation_cache[cache_key]
+        prompt = self.PERSIAN_TRANSLATION_PROMPT.format(text=text)
+        
+        # Check cache; key on model and full prompt so a prompt or model change never serves stale output
+        cache_key = f"persian_{self.model}_{hash(prompt)}"
+        if use_cache:
+            cached_text = self._get_cached_translation(cache_key)
+            if cached_text is not None:
+                return cached_text
         
         for attempt in range(max_retries):
             try:
                 response = self.client.completions.create(
                     model=self.model,
-                    prompt=self.PERSIAN_TRANSLATION_PROMPT.format(text=text),
+                    prompt=prompt,
                     max_tokens=4000,
                     temperature=0.1
                 )
@@ -86,7 +133,7 @@ Persian Translation:
                 processed_text = self.persian_processor.format_persian_text(translated_text)
                 
                 # Cache the result
-                self.translation_cache[cache_key] = processed_text
+                self._cache_translation(cache_key, processed_text)
                 
                 return processed_text
                 
@@ -111,18 +158,24 @@ Persian Translation:
         
         return text
 
-    def translate_page(self, db: Session, page_id: int) -> PDFPage:
-        """Translate a single page and update database with Persian optimization"""
-        page = db.query(PDFPage).filter(PDFPage.id == page_id).first()
+    def translate_page(self, db: Session, page_id: int, commit: bool = True) -> PDFPage:
+        """Translate a single page and update database with Persian optimization
+        
+        With commit=False the changes are only flushed so the caller can commit them
+        together with its own writes.
+        """
+        page = db.get(PDFPage, page_id)
         if not page:
             raise ValueError("Page not found")
         
         try:
-            page.translation_status = "processing"
-            db.commit()
+            # Page fields are written once the translation finishes, so a
+            # successful translation costs a single commit
+            logger.info(f"Translating page {page_id}")
             
             start_time = time.time()
-            translated_text = self.translate_text(page.original_text)
+            # Always call the model so retranslating a page gives fresh output
+            translated_text = self.translate_text(page.original_text, use_cache=False)
             translation_time = time.time() - start_time
             
             # Validate Persian translation quality
@@ -137,16 +190,19 @@ Persian Translation:
             page.translation_model = self.model
             
             # Store validation results in metadata
-            if not hasattr(page, 'metadata') or page.metadata is None:
-                page.metadata = {}
-            page.metadata['persian_validation'] = validation_result
+            page.page_metadata = {**(page.page_metadata or {}), 'persian_validation': validation_result}
             
-            db.commit()
+            if commit:
+                db.commit()
+            else:
+                db.flush()
             return page
             
         except Exception as e:
-            page.translation_status = "failed"
-            db.commit()
+            if commit:
+                db.rollback()
+                page.translation_status = "failed"
+                db.commit()
             raise e
     
     def translate_with_quality_check(self, text: str) -> Dict:
@@ -189,3 +245,9 @@ Persian Translation:
         except Exception as e:
             logger.error(f"Error getting translation statistics: {e}")
             return {}
+
+
+@lru_cache(maxsize=1)
+def get_translation_service() -> TranslationService:
+    """Return the shared TranslationService (OpenAI client and tokenizer are built once)"""
+    return TranslationService()
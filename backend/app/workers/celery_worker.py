@@ -1,11 +1,14 @@
 from celery import Celery
 from app.core.config import settings
 from app.core.database import SessionLocal
-from app.services.translation_service import TranslationService
-from app.models.models import PDFPage, TranslationJob
+from app.services.translation_service import get_translation_service
+from app.services.semantic_analyzer import get_semantic_analyzer
+from app.services.job_service import mark_job_failed
+from app.models.models import PDFPage, TranslationJob, SampleTranslation
 import logging
-from sqlalchemy.orm import Session
+from sqlalchemy import update
 from datetime import datetime
+from typing import Optional
 
 logger = logging.getLogger(__name__)
 
@@ -21,17 +24,20 @@ celery_app.conf.update(
     result_serializer='json',
     timezone='UTC',
     enable_utc=True,
+    # Analysis and translation tasks run for minutes; don't let one worker
+    # process reserve queued jobs while it is busy with a long one
+    worker_prefetch_multiplier=1,
 )
 
 @celery_app.task(bind=True, max_retries=3)
 def translate_page_task(self, page_id: int, job_id: int):
     """Celery task to translate a single page"""
     db = SessionLocal()
-    translation_service = TranslationService()
+    translation_service = get_translation_service()
     
     try:
         # Update job progress
-        job = db.query(TranslationJob).filter(TranslationJob.id == job_id).first()
+        job = db.get(TranslationJob, job_id)
         if job:
             job.pages_processed += 1
             db.commit()
@@ -54,6 +60,8 @@ def process_document_translation(self, document_id: int):
     """Process entire document translation"""
     db = SessionLocal()
     job = None
+    page_ids = []
+    queued_count = 0
     try:
         # Create translation job
         job = TranslationJob(
@@ -66,25 +74,38 @@ def process_document_translation(self, document_id: int):
         db.add(job)
         db.commit()
         
-        # Get pages to translate
-        pages = db.query(PDFPage).filter(
-            PDFPage.document_id == document_id,
-            PDFPage.translation_status == "pending"
-        ).all()
+        # Claim pending pages in one conditional UPDATE so a concurrent run cannot queue them again
+        page_ids = db.execute(
+            update(PDFPage)
+            .where(PDFPage.document_id == document_id, PDFPage.translation_status == "pending")
+            .values(translation_status="processing")
+            .returning(PDFPage.id)
+        ).scalars().all()
+        db.commit()
         
         # Start translation tasks
-        for page in pages:
-            translate_page_task.delay(page.id, job.id)
+        for page_id in page_ids:
+            translate_page_task.delay(page_id, job.id)
+            queued_count += 1
         
         job.status = "started"
         db.commit()
         
-        return {"status": "started", "job_id": job.id, "total_pages": len(pages)}
+        return {"status": "started", "job_id": job.id, "total_pages": len(page_ids)}
         
     except Exception as e:
         logger.error(f"Error processing document {document_id}: {e}")
         if job is not None:
             try:
+                db.rollback()
+                # Release claimed pages that never got a task
+                unqueued_page_ids = page_ids[queued_count:]
+                if unqueued_page_ids:
+                    db.execute(
+                        update(PDFPage)
+                        .where(PDFPage.id.in_(unqueued_page_ids))
+                        .values(translation_status="pending")
+                    )
                 job.status = "failed"
                 db.commit()
             except Exception:
@@ -93,3 +114,104 @@ def process_document_translation(self, document_id: int):
         
     finally:
         db.close()
+
+@celery_app.task
+def process_semantic_analysis(document_id: int, job_id: int):
+    """Run semantic analysis for a document in the background"""
+    db = SessionLocal()
+    job = None
+    try:
+        job = db.get(TranslationJob, job_id)
+        if job is None:
+            logger.warning(f"Job {job_id} not found, skipping")
+            return {"status": "skipped", "job_id": job_id}
+        job.status = "processing"
+        job.started_at = datetime.utcnow()
+        db.commit()
+        
+        structures_found = get_semantic_analyzer().analyze_and_save_document(db, document_id)
+        
+        job.status = "completed"
+        job.completed_at = datetime.utcnow()
+        job.results_summary = {"structures_found": structures_found}
+        db.commit()
+        
+        return {"status": "completed", "job_id": job_id, "structures_found": structures_found}
+        
+    except Exception as e:
+        logger.error(f"Error analyzing document {document_id}: {e}")
+        mark_job_failed(db, job, e)
+        raise e
+        
+    finally:
+        db.close()
+
+@celery_app.task
+def process_sample_translation(page_id: int, job_id: int, paragraph_index: Optional[int] = None):
+    """Translate a sample page, or one of its paragraphs, in the background"""
+    db = SessionLocal()
+    translation_service = get_translation_service()
+    job = None
+    try:
+        job = db.get(TranslationJob, job_id)
+        if job is None:
+            logger.warning(f"Job {job_id} not found, skipping")
+            return {"status": "skipped", "job_id": job_id}
+        job.status = "processing"
+        job.started_at = datetime.utcnow()
+        db.commit()
+        
+        # The page translation, sample row and job result are committed together
+        if paragraph_index is None:
+            page = translation_service.translate_page(db, page_id, commit=False)
+            sample_translation = SampleTranslation(
+                document_id=page.document_id,
+                page_id=page.id,
+                sample_type="page",
+                sample_text=page.original_text,
+                translated_text=page.translated_text,
+                cost_estimate=page.cost_estimate,
+                processing_time=page.translation_time,
+                quality_score=0.9  # Placeholder
+            )
+        else:
+            page = db.get(PDFPage, page_id)
+            paragraph_text = page.paragraphs[paragraph_index].get("text", "")
+            sample_translation = SampleTranslation(
+                document_id=page.document_id,
+                page_id=page.id,
+                sample_type="paragraph",
+                sample_text=paragraph_text,
+                translated_text=translation_service.translate_text(paragraph_text, use_cache=False),
+                cost_estimate=translation_service.estimate_cost(paragraph_text),
+                processing_time=0.5,  # Placeholder
+                quality_score=0.9  # Placeholder
+            )
+        
+        db.add(sample_translation)
+        db.flush()
+        
+        job.status = "completed"
+        job.completed_at = datetime.utcnow()
+        job.pages_processed = 1
+        job.actual_cost = sample_translation.cost_estimate
+        job.results_summary = {
+            "sample_id": sample_translation.id,
+            "sample_type": sample_translation.sample_type,
+            "page_number": page.page_number,
+            "paragraph_index": paragraph_index,
+            "cost_estimate": sample_translation.cost_estimate,
+            "processing_time": sample_translation.processing_time,
+            "quality_score": sample_translation.quality_score
+        }
+        db.commit()
+        
+        return {"status": "completed", "job_id": job_id, "sample_id": sample_translation.id}
+        
+    except Exception as e:
+        logger.error(f"Error translating sample for page {page_id}: {e}")
+        mark_job_failed(db, job, e)
+        raise e
+        
+    finally:
+        db.close()
@@ -0,0 +1,56 @@
+# API tests for the basic documents endpoints
+# backend/tests/test_documents_api.py
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.database import Base, get_db
+from app.main import app
+from app.models.models import PDFDocument
+from app.services.translation_service import get_translation_service
+
+
+@pytest.fixture
+def db_session():
+    """In-memory SQLite session with the full schema"""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+@pytest.fixture
+def client(db_session):
+    """Test client wired to the in-memory session, with no OpenAI client"""
+    app.dependency_overrides[get_db] = lambda: db_session
+    app.dependency_overrides[get_translation_service] = lambda: None
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.clear()
+
+
+def test_mark_test_page_returns_404_for_missing_page(client, db_session):
+    document = PDFDocument(
+        filename="sample.pdf",
+        original_filename="sample.pdf",
+        file_path="/tmp/sample.pdf",
+    )
+    db_session.add(document)
+    db_session.commit()
+
+    response = client.post(f"/api/documents/{document.id}/pages/99/test")
+
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Page not found"